@@ -3,15 +3,37 @@
 Monte Carlo simulation for forecasting story completion based on historical throughput.
 """
 
+import os
 import sys
-import random
 from datetime import datetime, timedelta
-from typing import List, Tuple
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import List, Tuple, Union
 import json
 
+import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; without it results are serialized with the json module
+    orjson = None
+
+# Below this many simulations, starting worker processes costs more than it saves
+PARALLEL_MIN_SIMULATIONS = 200_000
+
+
+@lru_cache(maxsize=256)
 def parse_date(date_str: str) -> datetime:
     """Parse a date string in various common formats."""
+    # Fast path for ISO dates (YYYY-MM-DD), by far the most common input;
+    # fromisoformat also accepts times and offsets, so only use it for that form
+    if len(date_str) == 10 and date_str[4] == date_str[7] == '-':
+        try:
+            return datetime.fromisoformat(date_str)
+        except ValueError:
+            pass
+    
     formats = [
         "%Y-%m-%d",
         "%d/%m/%Y",
@@ -34,8 +56,33 @@ def parse_date(date_str: str) -> datetime:
     raise ValueError(f"Unable to parse date: {date_str}")
 
 
+def quantiles_from_sorted(sorted_arr: np.ndarray, qs: List[float]) -> np.ndarray:
+    """Get the values at the given percentiles (0-100) of an already-sorted array."""
+    indices = (np.asarray(qs) * len(sorted_arr) // 100).astype(int)
+    return sorted_arr[np.minimum(indices, len(sorted_arr) - 1)]
+
+
+def _run_chunk(args: Tuple[np.ndarray, int, int, np.random.SeedSequence]) -> np.ndarray:
+    """Run a chunk of simulations, returning the stories completed in each."""
+    tp, days_until_target, n, seed = args
+    
+    rng = np.random.default_rng(seed)
+    out = np.empty(n, dtype=np.int32)
+    
+    # Draw every day of a block of simulations at once by sampling indices
+    # into the historical throughput, then total each row; keep each block to
+    # ~16M cells however many simulations and days are requested
+    rows = max(1, (1 << 24) // max(1, days_until_target))
+    for start in range(0, n, rows):
+        stop = min(start + rows, n)
+        idx = rng.integers(0, tp.size, size=(stop - start, days_until_target), dtype=np.int32)
+        tp[idx].sum(axis=1, dtype=np.int32, out=out[start:stop])
+    
+    return out
+
+
 def monte_carlo_how_many(
-    throughput: List[int],
+    throughput: Union[List[int], np.ndarray],
     target_date: str,
     confidence_level: float = 85.0,
     num_simulations: int = 10000,
@@ -45,7 +92,7 @@ def monte_carlo_how_many(
     Run Monte Carlo simulation to forecast story completion.
     
     Args:
-        throughput: List of daily throughput values (stories completed per day)
+        throughput: List or array of daily throughput values (stories completed per day)
         target_date: Future date to forecast for (string format)
         confidence_level: Desired confidence level as percentage (e.g., 85 for 85%)
         num_simulations: Number of Monte Carlo simulations to run
@@ -62,9 +109,12 @@ def monte_carlo_how_many(
         - throughput_stats: Statistics about input throughput
     """
     
-    if not throughput or len(throughput) < 10:
+    if len(throughput) < 10:
         raise ValueError("Throughput data must contain at least 10 days of data")
     
+    if not np.all(np.mod(throughput, 1) == 0):
+        raise ValueError("Throughput data must contain whole numbers of stories per day")
+    
     if not 0 < confidence_level < 100:
         raise ValueError("Confidence level must be between 0 and 99 (100% confidence is not possible in probabilistic forecasting)")
     
@@ -82,54 +132,61 @@ def monte_carlo_how_many(
     # Calculate number of days
     days_until_target = (target - start).days
     
-    # Run simulations
-    simulation_results = []
+    # Run simulations, split across CPU cores when there are enough of them
+    tp = np.asarray(throughput).astype(np.int64)
     
-    for _ in range(num_simulations):
-        total_stories = 0
-        for _ in range(days_until_target):
-            # Randomly sample from historical throughput
-            daily_throughput = random.choice(throughput)
-            total_stories += daily_throughput
-        simulation_results.append(total_stories)
+    # Sample from the narrowest integer type that holds the throughput (int8
+    # or uint8 for typical daily counts) so the gather stays cache-resident;
+    # totals are still accumulated as int32
+    tp = tp.astype(np.result_type(np.min_scalar_type(tp.min()), np.min_scalar_type(tp.max())))
+    workers = os.cpu_count() or 1
     
-    # Sort results for percentile calculations
-    simulation_results.sort()
+    if workers == 1 or num_simulations < PARALLEL_MIN_SIMULATIONS:
+        sims = _run_chunk((tp, days_until_target, num_simulations, None))
+    else:
+        # Give each worker its own seed so the random streams are independent
+        seeds = np.random.SeedSequence().spawn(workers)
+        sizes = [num_simulations // workers + (i < num_simulations % workers) for i in range(workers)]
+        with Pool(workers) as pool:
+            chunks = pool.map(_run_chunk, [
+                (tp, days_until_target, size, seed) for size, seed in zip(sizes, seeds)
+            ])
+        sims = np.empty(num_simulations, dtype=np.int32)
+        np.concatenate(chunks, out=sims)
     
-    # Calculate percentiles
-    def get_percentile(data: List[int], percentile: float) -> int:
-        """Get the value at a given percentile."""
-        index = int((percentile / 100.0) * len(data))
-        return data[min(index, len(data) - 1)]
+    # Sort once, then read every percentile straight out of the sorted
+    # results; for "at least X with Y% confidence", we need the (100-Y)
+    # percentile, e.g. 85% confidence of "at least" = 15th percentile (P15)
+    sims.sort()
+    inverse_percentile = 100 - confidence_level
+    qs = [95, 75, 50, 30, 15, 5, 1, inverse_percentile]
+    vals = quantiles_from_sorted(sims, qs)
     
     percentiles = {
-        'P5': get_percentile(simulation_results, 95),
-        'P25': get_percentile(simulation_results, 75),
-        'P50': get_percentile(simulation_results, 50),
-        'P70': get_percentile(simulation_results, 30),
-        'P85': get_percentile(simulation_results, 15),
-        'P95': get_percentile(simulation_results, 5),
-        'P99': get_percentile(simulation_results, 1)
+        'P5': vals[0],
+        'P25': vals[1],
+        'P50': vals[2],
+        'P70': vals[3],
+        'P85': vals[4],
+        'P95': vals[5],
+        'P99': vals[6]
     }
     
     # Get value at specified confidence level
-    # For "at least X with Y% confidence", we need the (100-Y) percentile
-    # E.g., 85% confidence of "at least" = 15th percentile (P15)
-    inverse_percentile = 100 - confidence_level
-    stories_at_confidence = get_percentile(simulation_results, inverse_percentile)
+    stories_at_confidence = vals[7]
     
     # Calculate throughput statistics
-    throughput_mean = sum(throughput) / len(throughput)
-    throughput_min = min(throughput)
-    throughput_max = max(throughput)
+    throughput_mean = np.mean(throughput)
+    throughput_min = np.min(throughput)
+    throughput_max = np.max(throughput)
     
     return {
         'stories_at_confidence': stories_at_confidence,
         'confidence_level': confidence_level,
         'percentiles': percentiles,
-        'mean': sum(simulation_results) / len(simulation_results),
-        'min': min(simulation_results),
-        'max': max(simulation_results),
+        'mean': sims.mean(),
+        'min': sims[0],
+        'max': sims[-1],
         'days_until_target': days_until_target,
         'target_date': target_date,
         'start_date': start.strftime('%Y-%m-%d'),
@@ -143,50 +200,54 @@ def monte_carlo_how_many(
     }
 
 
+def to_json(results: dict) -> str:
+    """Serialize simulation results as indented JSON, including NumPy values."""
+    if orjson is not None:
+        return orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(results, indent=2, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+
 def format_results(results: dict) -> str:
     """Format simulation results as human-readable text."""
-    output = []
-    output.append("=" * 60)
-    output.append("MONTE CARLO 'HOW MANY' SIMULATION RESULTS")
-    output.append("=" * 60)
-    output.append("")
-    
-    output.append(f"📊 FORECAST SUMMARY")
-    output.append(f"   Target Date: {results['target_date']}")
-    output.append(f"   Start Date: {results['start_date']}")
-    output.append(f"   Days Until Target: {results['days_until_target']} days")
-    output.append(f"   Simulations Run: {results['num_simulations']:,}")
-    output.append("")
-    
-    output.append(f"✨ ANSWER AT {results['confidence_level']}% CONFIDENCE")
-    output.append(f"   You will complete {results['stories_at_confidence']} stories OR MORE")
-    output.append(f"   by {results['target_date']} if you start on {results['start_date']}")
-    output.append(f"   with {results['confidence_level']}% confidence")
-    output.append(f"   (There's a {results['confidence_level']:.0f}% chance of completing {results['stories_at_confidence']} stories or more)")
-    output.append("")
-    
-    output.append("📈 PERCENTILE FORECAST")
+    rule = "=" * 60
+    stats = results['throughput_stats']
+    
     # Always display these percentiles in order
     percentile_order = ['P99', 'P95', 'P85', 'P70', 'P50']
-    for label in percentile_order:
-        if label in results['percentiles']:
-            output.append(f"   {label}: {results['percentiles'][label]} stories")
-    output.append("")
-    
-    output.append("📉 STATISTICAL SUMMARY")
-    output.append(f"   Mean (Average): {results['mean']:.1f} stories")
-    output.append(f"   Range: {results['min']} - {results['max']} stories")
-    output.append("")
+    percentile_lines = "".join(
+        f"   {label}: {results['percentiles'][label]} stories\n"
+        for label in percentile_order
+        if label in results['percentiles']
+    )
     
-    output.append("📋 HISTORICAL THROUGHPUT")
-    output.append(f"   Sample Size: {results['throughput_stats']['samples']} days")
-    output.append(f"   Average Daily: {results['throughput_stats']['mean']:.1f} stories/day")
-    output.append(f"   Range: {results['throughput_stats']['min']} - {results['throughput_stats']['max']} stories/day")
-    output.append("")
-    
-    output.append("=" * 60)
-    
-    return "\n".join(output)
+    return f"""{rule}
+MONTE CARLO 'HOW MANY' SIMULATION RESULTS
+{rule}
+
+📊 FORECAST SUMMARY
+   Target Date: {results['target_date']}
+   Start Date: {results['start_date']}
+   Days Until Target: {results['days_until_target']} days
+   Simulations Run: {results['num_simulations']:,}
+
+✨ ANSWER AT {results['confidence_level']}% CONFIDENCE
+   You will complete {results['stories_at_confidence']} stories OR MORE
+   by {results['target_date']} if you start on {results['start_date']}
+   with {results['confidence_level']}% confidence
+   (There's a {results['confidence_level']:.0f}% chance of completing {results['stories_at_confidence']} stories or more)
+
+📈 PERCENTILE FORECAST
+{percentile_lines}
+📉 STATISTICAL SUMMARY
+   Mean (Average): {results['mean']:.1f} stories
+   Range: {results['min']} - {results['max']} stories
+
+📋 HISTORICAL THROUGHPUT
+   Sample Size: {stats['samples']} days
+   Average Daily: {stats['mean']:.1f} stories/day
+   Range: {stats['min']} - {stats['max']} stories/day
+
+{rule}"""
 
 
 def main():
@@ -205,7 +266,7 @@ def main():
     
     # Parse throughput
     throughput_str = sys.argv[1]
-    throughput = [int(x.strip()) for x in throughput_str.split(',')]
+    throughput = np.fromstring(throughput_str, sep=',', dtype=np.int32)
     
     # Parse target date
     target_date = sys.argv[2]
@@ -217,7 +278,7 @@ def main():
     num_simulations = int(sys.argv[4]) if len(sys.argv) > 4 else 10000
     
     # Parse optional start date
-    start_date = sys.argv[5] if len(sys.argv) > 5 else none   
+    start_date = sys.argv[5] if len(sys.argv) > 5 else None
     
     try:
         results = monte_carlo_how_many(
@@ -233,7 +294,7 @@ def main():
         
         # Also output JSON for programmatic access
         print("\nJSON Output:")
-        print(json.dumps(results, indent=2))
+        print(to_json(results))
         
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
@@ -3,15 +3,44 @@
 Monte Carlo simulation for forecasting completion date based on stories remaining and historical throughput.
 """
 
+import math
+import os
 import sys
-import random
-from datetime import datetime, timedelta
-from typing import List, Tuple
+from datetime import datetime
+from functools import lru_cache
+from multiprocessing import Pool
+from typing import List, Tuple, Union
 import json
 
+import numpy as np
 
+try:
+    import orjson
+except ImportError:
+    # orjson is optional; without it results are serialized with the json module
+    orjson = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    # Numba is optional; without it the simulation runs as vectorized NumPy
+    njit = None
+
+# Below this many simulations, starting worker processes costs more than it saves
+PARALLEL_MIN_SIMULATIONS = 200_000
+
+
+@lru_cache(maxsize=256)
 def parse_date(date_str: str) -> datetime:
     """Parse a date string in various common formats."""
+    # Fast path for ISO dates (YYYY-MM-DD), by far the most common input;
+    # fromisoformat also accepts times and offsets, so only use it for that form
+    if len(date_str) == 10 and date_str[4] == date_str[7] == '-':
+        try:
+            return datetime.fromisoformat(date_str)
+        except ValueError:
+            pass
+    
     formats = [
         "%Y-%m-%d",
         "%d/%m/%Y",
@@ -34,8 +63,84 @@ def parse_date(date_str: str) -> datetime:
     raise ValueError(f"Unable to parse date: {date_str}")
 
 
+def quantiles_from_sorted(sorted_arr: np.ndarray, qs: List[float]) -> np.ndarray:
+    """Get the values at the given percentiles (0-100) of an already-sorted array."""
+    indices = (np.asarray(qs) * len(sorted_arr) // 100).astype(int)
+    return sorted_arr[np.minimum(indices, len(sorted_arr) - 1)]
+
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _sim_when(tp: np.ndarray, stories_remaining: int, n: int, max_days: int) -> np.ndarray:
+        """
+        Run n simulations, returning the days each took to complete the stories.
+        
+        Simulations still running after max_days are stopped and reported as max_days + 1.
+        """
+        out = np.empty(n, np.int32)
+        for i in prange(n):
+            stories_completed = 0
+            days = 0
+            # Keep going until we've completed all stories
+            while stories_completed < stories_remaining and days <= max_days:
+                # Randomly sample from historical throughput
+                stories_completed += tp[np.random.randint(0, tp.size)]
+                days += 1
+            out[i] = days
+        return out
+
+    # Compile the kernel up front so the first forecast doesn't pay for it
+    _sim_when(np.ones(1, np.int32), 1, 1, 1)
+else:
+    def _sim_when(
+        tp: np.ndarray,
+        stories_remaining: int,
+        n: int,
+        max_days: int,
+        seed: np.random.SeedSequence = None
+    ) -> np.ndarray:
+        """
+        Run n simulations, returning the days each took to complete the stories.
+        
+        Simulations still running after max_days are stopped and reported as max_days + 1.
+        """
+        rng = np.random.default_rng(seed)
+        out = np.empty(n, np.int32)
+        
+        # Draw a block of days for every simulation still running, and find
+        # the first day each running total reaches the stories remaining
+        pending = np.arange(n)
+        stories_completed = np.zeros(n, np.int32)
+        elapsed = 0
+        block_days = max(1, int(4 * stories_remaining / max(1, tp.mean())))
+        
+        while pending.size and elapsed < max_days:
+            # Keep each block to ~16M cells however long the forecast runs
+            block = max(1, min(block_days, (1 << 24) // pending.size, max_days - elapsed))
+            draws = tp[rng.integers(0, tp.size, size=(pending.size, block), dtype=np.int32)]
+            cum = draws.cumsum(axis=1, dtype=np.int32) + stories_completed[:, None]
+            done = cum >= stories_remaining
+            finished = done.any(axis=1)
+            out[pending[finished]] = elapsed + done[finished].argmax(axis=1) + 1
+            
+            # Carry unfinished simulations over into a longer block
+            stories_completed = cum[~finished, -1]
+            pending = pending[~finished]
+            elapsed += block
+            block_days *= 2
+        
+        out[pending] = max_days + 1
+        return out
+
+
+def _run_chunk(args: Tuple[np.ndarray, int, int, int, np.random.SeedSequence]) -> np.ndarray:
+    """Run a chunk of simulations on the NumPy kernel in a worker process."""
+    tp, stories_remaining, n, max_days, seed = args
+    return _sim_when(tp, stories_remaining, n, max_days, seed)
+
+
 def monte_carlo_when(
-    throughput: List[int],
+    throughput: Union[List[int], np.ndarray],
     stories_remaining: int,
     confidence_level: float = 85.0,
     num_simulations: int = 10000,
@@ -45,7 +150,7 @@ def monte_carlo_when(
     Run Monte Carlo simulation to forecast completion date.
     
     Args:
-        throughput: List of daily throughput values (stories completed per day)
+        throughput: List or array of daily throughput values (stories completed per day)
         stories_remaining: Number of stories that need to be completed
         confidence_level: Desired confidence level as percentage (e.g., 85 for 85%)
         num_simulations: Number of Monte Carlo simulations to run
@@ -63,7 +168,7 @@ def monte_carlo_when(
         - throughput_stats: Statistics about input throughput
     """
     
-    if not throughput or len(throughput) < 10:
+    if len(throughput) < 10:
         raise ValueError("Throughput data must contain at least 10 days of data")
     
     if stories_remaining <= 0:
@@ -72,82 +177,91 @@ def monte_carlo_when(
     if not 0 < confidence_level < 100:
         raise ValueError("Confidence level must be between 0 and 99 (100% confidence is not possible in probabilistic forecasting)")
     
+    if not np.all(np.mod(throughput, 1) == 0):
+        raise ValueError("Throughput data must contain whole numbers of stories per day")
+    
+    if np.sum(throughput) <= 0:
+        raise ValueError("Throughput data must contain at least one day with completed stories")
+    
     # Parse start date
     if start_date:
         start = parse_date(start_date)
     else:
         start = datetime.now()
     
-    # Run simulations
-    simulation_days = []
+    # Run simulations, capping each at a bound far beyond any plausible
+    # outcome so a near-empty throughput history can't run away
+    tp = np.asarray(throughput, np.int32)
+    max_days = 100 * math.ceil(stories_remaining / tp.mean())
+    workers = os.cpu_count() or 1
     
-    for _ in range(num_simulations):
-        stories_completed = 0
-        days = 0
-        
-        # Keep going until we've completed all stories
-        while stories_completed < stories_remaining:
-            # Randomly sample from historical throughput
-            daily_throughput = random.choice(throughput)
-            stories_completed += daily_throughput
-            days += 1
-        
-        simulation_days.append(days)
-    
-    # Sort results for percentile calculations
+    # The Numba kernel already runs across all cores, so only the NumPy kernel
+    # is split across worker processes
+    if njit is not None or workers == 1 or num_simulations < PARALLEL_MIN_SIMULATIONS:
+        simulation_days = _sim_when(tp, stories_remaining, num_simulations, max_days)
+    else:
+        # Give each worker its own seed so the random streams are independent
+        seeds = np.random.SeedSequence().spawn(workers)
+        sizes = [num_simulations // workers + (i < num_simulations % workers) for i in range(workers)]
+        with Pool(workers) as pool:
+            chunks = pool.map(_run_chunk, [
+                (tp, stories_remaining, size, max_days, seed) for size, seed in zip(sizes, seeds)
+            ])
+        simulation_days = np.empty(num_simulations, dtype=np.int32)
+        np.concatenate(chunks, out=simulation_days)
+    
+    # Sort once, then read every percentile straight out of the sorted
+    # results; for "done by X date with Y% confidence", we need the Y
+    # percentile, e.g. 85% confidence of "done by" = 85th percentile (P85)
     simulation_days.sort()
+    if simulation_days[-1] > max_days:
+        raise ValueError(f"Simulations did not complete within {max_days} days; throughput history has too few completed stories to forecast")
     
-    # Calculate percentiles
-    def get_percentile(data: List[int], percentile: float) -> int:
-        """Get the value at a given percentile."""
-        index = int((percentile / 100.0) * len(data))
-        return data[min(index, len(data) - 1)]
+    qs = [25, 50, 70, 85, 95, 99, confidence_level]
+    vals = quantiles_from_sorted(simulation_days, qs)
     
     days_percentiles = {
-        'P25': get_percentile(simulation_days, 25),
-        'P50': get_percentile(simulation_days, 50),
-        'P70': get_percentile(simulation_days, 70),
-        'P85': get_percentile(simulation_days, 85),
-        'P95': get_percentile(simulation_days, 95),
-        'P99': get_percentile(simulation_days, 99)
+        'P25': vals[0],
+        'P50': vals[1],
+        'P70': vals[2],
+        'P85': vals[3],
+        'P95': vals[4],
+        'P99': vals[5]
     }
     
     # Get days at specified confidence level
-    # For "done by X date with Y% confidence", we need the Y percentile
-    # E.g., 85% confidence of "done by" = 85th percentile (P85)
-    days_at_confidence = get_percentile(simulation_days, confidence_level)
-    
-    # Convert days to dates
-    def days_to_date(days: int) -> datetime:
-        return start + timedelta(days=days)
+    days_at_confidence = vals[6]
     
-    completion_date_at_confidence = days_to_date(days_at_confidence)
+    mean_days = simulation_days.mean()
     
-    percentile_dates = {
-        key: days_to_date(days).strftime('%Y-%m-%d')
-        for key, days in days_percentiles.items()
-    }
+    # Convert all days to dates in one go: percentiles, then the
+    # confidence level, mean, min and max
+    base = np.datetime64(start.date(), 'D')
+    days = list(days_percentiles.values()) + [
+        days_at_confidence, int(mean_days), simulation_days[0], simulation_days[-1]
+    ]
+    dates = (base + np.asarray(days, 'timedelta64[D]')).astype(str).tolist()
     
-    mean_days = sum(simulation_days) / len(simulation_days)
-    mean_date = days_to_date(int(mean_days))
+    percentile_dates = dict(zip(days_percentiles, dates))
+    completion_date_at_confidence, mean_date, min_date, max_date = dates[len(days_percentiles):]
     
     # Calculate throughput statistics
-    throughput_mean = sum(throughput) / len(throughput)
-    throughput_min = min(throughput)
-    throughput_max = max(throughput)
+    throughput_mean = np.mean(throughput)
+    throughput_min = np.min(throughput)
+    throughput_max = np.max(throughput)
     
     return {
-        'completion_date_at_confidence': completion_date_at_confidence.strftime('%Y-%m-%d'),
+        'completion_date_at_confidence': completion_date_at_confidence,
         'days_at_confidence': days_at_confidence,
         'confidence_level': confidence_level,
         'percentile_dates': percentile_dates,
         'days_percentiles': days_percentiles,
-        'mean_date': mean_date.strftime('%Y-%m-%d'),
+        'mean_date': mean_date,
         'mean_days': mean_days,
-        'min_date': days_to_date(min(simulation_days)).strftime('%Y-%m-%d'),
-        'min_days': min(simulation_days),
-        'max_date': days_to_date(max(simulation_days)).strftime('%Y-%m-%d'),
-        'max_days': max(simulation_days),
+        'min_date': min_date,
+        'min_days': simulation_days[0],
+        'max_date': max_date,
+        'max_days': simulation_days[-1],
         'start_date': start.strftime('%Y-%m-%d'),
         'stories_remaining': stories_remaining,
         'num_simulations': num_simulations,
@@ -160,52 +274,54 @@ def monte_carlo_when(
     }
 
 
+def to_json(results: dict) -> str:
+    """Serialize simulation results as indented JSON, including NumPy values."""
+    if orjson is not None:
+        return orjson.dumps(results, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode()
+    return json.dumps(results, indent=2, default=lambda o: o.item() if hasattr(o, 'item') else str(o))
+
+
 def format_results(results: dict) -> str:
     """Format simulation results as human-readable text."""
-    output = []
-    output.append("=" * 60)
-    output.append("MONTE CARLO 'WHEN' SIMULATION RESULTS")
-    output.append("=" * 60)
-    output.append("")
-    
-    output.append(f"📊 FORECAST SUMMARY")
-    output.append(f"   Stories Remaining: {results['stories_remaining']}")
-    output.append(f"   Start Date: {results['start_date']}")
-    output.append(f"   Simulations Run: {results['num_simulations']:,}")
-    output.append("")
+    rule = "=" * 60
+    stats = results['throughput_stats']
     
-    output.append(f"✨ ANSWER AT {results['confidence_level']}% CONFIDENCE")
-    output.append(f"   You will complete the work on or before {results['completion_date_at_confidence']}")
-    output.append(f"   ({results['days_at_confidence']} days from start date)")
-    output.append(f"   with {results['confidence_level']}% confidence")
-    output.append(f"   (There's a {results['confidence_level']:.0f}% chance of finishing on or before this date)")
-    output.append("")
-    
-    output.append("📅 PERCENTILE FORECAST (Dates)")
     # Display percentiles from optimistic to conservative
     percentile_order = ['P25', 'P50', 'P70', 'P85', 'P95', 'P99']
-    for label in percentile_order:
-        if label in results['percentile_dates']:
-            days = results['days_percentiles'][label]
-            date = results['percentile_dates'][label]
-            output.append(f"   {label}: {date} ({days} days)")
-    output.append("")
-    
-    output.append("📈 STATISTICAL SUMMARY")
-    output.append(f"   Mean (Average): {results['mean_date']} ({results['mean_days']:.1f} days)")
-    output.append(f"   Best Case: {results['min_date']} ({results['min_days']} days)")
-    output.append(f"   Worst Case: {results['max_date']} ({results['max_days']} days)")
-    output.append("")
-    
-    output.append("📋 HISTORICAL THROUGHPUT")
-    output.append(f"   Sample Size: {results['throughput_stats']['samples']} days")
-    output.append(f"   Average Daily: {results['throughput_stats']['mean']:.1f} stories/day")
-    output.append(f"   Range: {results['throughput_stats']['min']} - {results['throughput_stats']['max']} stories/day")
-    output.append("")
-    
-    output.append("=" * 60)
-    
-    return "\n".join(output)
+    percentile_lines = "".join(
+        f"   {label}: {results['percentile_dates'][label]} ({results['days_percentiles'][label]} days)\n"
+        for label in percentile_order
+        if label in results['percentile_dates']
+    )
+    
+    return f"""{rule}
+MONTE CARLO 'WHEN' SIMULATION RESULTS
+{rule}
+
+📊 FORECAST SUMMARY
+   Stories Remaining: {results['stories_remaining']}
+   Start Date: {results['start_date']}
+   Simulations Run: {results['num_simulations']:,}
+
+✨ ANSWER AT {results['confidence_level']}% CONFIDENCE
+   You will complete the work on or before {results['completion_date_at_confidence']}
+   ({results['days_at_confidence']} days from start date)
+   with {results['confidence_level']}% confidence
+   (There's a {results['confidence_level']:.0f}% chance of finishing on or before this date)
+
+📅 PERCENTILE FORECAST (Dates)
+{percentile_lines}
+📈 STATISTICAL SUMMARY
+   Mean (Average): {results['mean_date']} ({results['mean_days']:.1f} days)
+   Best Case: {results['min_date']} ({results['min_days']} days)
+   Worst Case: {results['max_date']} ({results['max_days']} days)
+
+📋 HISTORICAL THROUGHPUT
+   Sample Size: {stats['samples']} days
+   Average Daily: {stats['mean']:.1f} stories/day
+   Range: {stats['min']} - {stats['max']} stories/day
+
+{rule}"""
 
 
 def main():
@@ -224,7 +340,7 @@ def main():
     
     # Parse throughput
     throughput_str = sys.argv[1]
-    throughput = [int(x.strip()) for x in throughput_str.split(',')]
+    throughput = np.fromstring(throughput_str, sep=',', dtype=np.int32)
     
     # Parse stories remaining
     stories_remaining = int(sys.argv[2])
@@ -252,7 +368,7 @@ def main():
         
         # Also output JSON for programmatic access
         print("\nJSON Output:")
-        print(json.dumps(results, indent=2))
+        print(to_json(results))
         
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)